@@ -3,20 +3,30 @@
 
 import os
 import sys
+import re
 import json
 import time
-import uuid
-import random
+import secrets
 import string
+import shutil
+import tempfile
+import signal
 import hashlib
+import types
 import platform
 import subprocess
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import logging
+import logging.handlers
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json
+    orjson = None
+
 # ANSI 颜色代码
 class Colors:
     CYAN = '\033[96m'
@@ -26,48 +36,95 @@ class Colors:
     MAGENTA = '\033[95m'
     RESET = '\033[0m'
 
+# 彩色输出的固定后缀，避免每行重新拼接
+COLOR_SUFFIX_NEWLINE = Colors.RESET + '\n'
+
 # 版本信息
 VERSION = "dev"
 
+# 模块日志记录器（只获取一次，避免每次调用都经过根记录器查找）
+logger = logging.getLogger(__name__)
+
 # 错误类型常量
 ERR_PERMISSION = "permission_error"
 ERR_CONFIG = "config_error"
 ERR_PROCESS = "process_error"
 ERR_SYSTEM = "system_error"
 
-# 配置类
-@dataclass
-class TextResource:
-    success_message: str = "[√] 配置文件已成功更新！"
-    restart_message: str = "[!] 请手动重启 Cursor 以使更新生效"
-    reading_config: str = "正在读取配置文件..."
-    generating_ids: str = "正在生成新的标识符..."
-    press_enter_to_exit: str = "按回车键退出程序..."
-    error_prefix: str = "程序发生严重错误: %v"
-    privilege_error: str = "\n[!] 错误：需要管理员权限"
-    run_with_sudo: str = "请使用 sudo 命令运行此程序"
-    sudo_example: str = "示例: sudo %s"
-    config_location: str = "配置文件位置:"
-    checking_processes: str = "正在检查运行中的 Cursor 实例..."
-    closing_processes: str = "正在关闭 Cursor 实例..."
-    processes_closed: str = "所有 Cursor 实例已关闭"
-    please_wait: str = "请稍候..."
-    set_readonly_message: str = "设置 storage.json 为只读模式, 这将导致 workspace 记录信息丢失等问题"
+# 运行平台（进程生命周期内不会变化，导入时确定一次）
+SYSTEM_NAME = platform.system()
+IS_DARWIN = SYSTEM_NAME == "Darwin"
+
+# 配置文件位置：用户主目录的上级目录 + 相对路径
+if IS_DARWIN:  # macOS
+    CONFIG_HOME_ROOT = "/Users"
+    CONFIG_RELATIVE_PATH = os.path.join("Library", "Application Support", "Cursor", "User", "globalStorage", "storage.json")
+else:  # Linux
+    CONFIG_HOME_ROOT = "/home"
+    CONFIG_RELATIVE_PATH = os.path.join(".config", "Cursor", "User", "globalStorage", "storage.json")
+
+# 进程匹配（与 pgrep -i cursor 行为一致）
+CURSOR_PROCESS_PATTERN = re.compile(rb"cursor", re.IGNORECASE)
+COMM_MAX_LEN = 15  # /proc/<pid>/comm 的最大长度（TASK_COMM_LEN - 1）
+
+# 机器ID字符表（去掉易混淆的 0 和 1），以及随机字节到字符的映射表
+MACHINE_ID_ALPHABET = (string.ascii_uppercase + "23456789").encode()
+MACHINE_ID_LENGTH = 23
+# 生成两位序号时可用的候选字节数（逐个拒绝 >= 200 的字节）
+MACHINE_ID_SEQUENCE_BYTES = 8
+
+# 各标识符所需的随机字节数
+MAC_MACHINE_ID_RANDOM_BYTES = 32
+MACHINE_ID_RANDOM_BYTES = MACHINE_ID_SEQUENCE_BYTES + MACHINE_ID_LENGTH + 8  # 多取 8 字节以覆盖被拒绝的字节
+DEV_DEVICE_ID_RANDOM_BYTES = 16
+# 丢弃超出 len(alphabet) 整数倍的字节，保证每个字符概率相同
+_MACHINE_ID_LIMIT = 256 - 256 % len(MACHINE_ID_ALPHABET)
+_MACHINE_ID_TABLE = bytes(MACHINE_ID_ALPHABET[b % len(MACHINE_ID_ALPHABET)] for b in range(256))
+_MACHINE_ID_REJECT = bytes(range(_MACHINE_ID_LIMIT, 256))
+
+# 用户确认输入
+CONFIRM_YES = frozenset(('y', 'yes', '是'))
+CONFIRM_NO = frozenset(('n', 'no', '否'))
+
+# 复用的解码器（读取始终使用标准库，以便原样保留未知字段；JSONConstant 定义见下方）
+JSON_DECODER = json.JSONDecoder(parse_constant=lambda constant: JSONConstant(constant))
+
+# 文本资源（只读常量）
+TEXT = types.SimpleNamespace(
+    success_message="[√] 配置文件已成功更新！",
+    restart_message="[!] 请手动重启 Cursor 以使更新生效",
+    reading_config="正在读取配置文件...",
+    generating_ids="正在生成新的标识符...",
+    press_enter_to_exit="按回车键退出程序...",
+    error_prefix="程序发生严重错误: %v",
+    privilege_error="\n[!] 错误：需要管理员权限",
+    run_with_sudo="请使用 sudo 命令运行此程序",
+    sudo_example="示例: sudo %s",
+    config_location="配置文件位置:",
+    checking_processes="正在检查运行中的 Cursor 实例...",
+    closing_processes="正在关闭 Cursor 实例...",
+    processes_closed="所有 Cursor 实例已关闭",
+    please_wait="请稍候...",
+    set_readonly_message="设置 storage.json 为只读模式, 这将导致 workspace 记录信息丢失等问题"
+)
 
+# 配置类
 @dataclass
 class StorageConfig:
+    __slots__ = ('telemetry_mac_machine_id', 'telemetry_machine_id', 'telemetry_dev_device_id', 'telemetry_sqm_id')
+
     telemetry_mac_machine_id: str
     telemetry_machine_id: str
     telemetry_dev_device_id: str
     telemetry_sqm_id: str
 
-    def to_dict(self) -> dict:
-        return {
-            "telemetry.macMachineId": self.telemetry_mac_machine_id,
-            "telemetry.machineId": self.telemetry_machine_id,
-            "telemetry.devDeviceId": self.telemetry_dev_device_id,
-            "telemetry.sqmId": self.telemetry_sqm_id
-        }
+    def update_into(self, data: dict) -> dict:
+        """将遥测字段直接写入已有字典并返回该字典"""
+        data["telemetry.macMachineId"] = self.telemetry_mac_machine_id
+        data["telemetry.machineId"] = self.telemetry_machine_id
+        data["telemetry.devDeviceId"] = self.telemetry_dev_device_id
+        data["telemetry.sqmId"] = self.telemetry_sqm_id
+        return data
 
 class AppError(Exception):
     def __init__(self, error_type: str, op: str, path: str, err: Exception, context: dict = None):
@@ -84,136 +141,266 @@ class AppError(Exception):
 
 @dataclass
 class SpinnerConfig:
+    __slots__ = ('frames', 'delay')
+
     frames: List[str]
     delay: float
 
 @dataclass
 class SystemConfig:
+    __slots__ = ('retry_attempts', 'retry_delay', 'timeout')
+
     retry_attempts: int
     retry_delay: float
     timeout: float
 
 class ProgressSpinner:
+    __slots__ = ('frames', 'current', 'message')
+
     def __init__(self, message: str):
         self.frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
         self.current = 0
         self.message = message
 
+class JSONConstant(float):
+    """从配置中读到的 NaN/Infinity（orjson 会把它们写成 null，用子类型强制回退到标准库）"""
+    __slots__ = ()
+
 def get_config_path(username: str) -> str:
     """获取配置文件路径"""
-    if platform.system() == "Darwin":  # macOS
-        return os.path.join("/Users", username, "Library", "Application Support", "Cursor", "User", "globalStorage", "storage.json")
-    else:  # Linux
-        return os.path.join("/home", username, ".config", "Cursor", "User", "globalStorage", "storage.json")
+    return os.path.join(CONFIG_HOME_ROOT, username, CONFIG_RELATIVE_PATH)
 
-def generate_machine_id() -> str:
+def generate_machine_id(random_bytes: Optional[bytes] = None) -> str:
     """生成新的机器ID"""
-    prefix = "auth0|user_"
-    sequence = f"{random.randint(0, 99):02d}"
-    unique_id = ''.join(random.choices(string.ascii_uppercase + string.digits.replace('0', '').replace('1', ''), k=23))
-    full_id = prefix + sequence + unique_id
-    return full_id.encode().hex()
-
-def generate_mac_machine_id() -> str:
+    # 全程以字节构建，最后直接转十六进制，省去 str.encode 的中间对象
+    if random_bytes is None:
+        random_bytes = secrets.token_bytes(MACHINE_ID_RANDOM_BYTES)
+    sequence_bytes = random_bytes[:MACHINE_ID_SEQUENCE_BYTES]
+    unique_bytes = random_bytes[MACHINE_ID_SEQUENCE_BYTES:]
+
+    # 取第一个小于 200 的字节对 100 取模，保证 00-99 均匀分布
+    sequence = next((b % 100 for b in sequence_bytes if b < 200), None)
+    if sequence is None:
+        sequence = secrets.randbelow(100)
+
+    full_id = bytearray(b"auth0|user_")
+    full_id += b"%02d" % sequence
+    start = len(full_id)
+    full_id += unique_bytes.translate(_MACHINE_ID_TABLE, _MACHINE_ID_REJECT)
+    # 被丢弃的字节过多时补充随机数
+    while len(full_id) - start < MACHINE_ID_LENGTH:
+        full_id += secrets.token_bytes(MACHINE_ID_LENGTH + 8).translate(_MACHINE_ID_TABLE, _MACHINE_ID_REJECT)
+    del full_id[start + MACHINE_ID_LENGTH:]
+    return full_id.hex()
+
+def generate_mac_machine_id(random_bytes: Optional[bytes] = None) -> str:
     """生成新的MAC机器ID"""
-    data = os.urandom(32)
-    return hashlib.sha256(data).hexdigest()
-
-def generate_dev_device_id() -> str:
-    """生成新的设备ID"""
-    return str(uuid.uuid4())
+    if random_bytes is None:
+        random_bytes = os.urandom(MAC_MACHINE_ID_RANDOM_BYTES)
+    return hashlib.sha256(random_bytes).hexdigest()
+
+def generate_dev_device_id(random_bytes: Optional[bytes] = None) -> str:
+    """生成新的设备ID（UUIDv4 格式）"""
+    if random_bytes is None:
+        random_bytes = os.urandom(DEV_DEVICE_ID_RANDOM_BYTES)
+    b = bytearray(random_bytes[:DEV_DEVICE_ID_RANDOM_BYTES])
+    b[6] = (b[6] & 0x0f) | 0x40  # 版本 4
+    b[8] = (b[8] & 0x3f) | 0x80  # RFC 4122 变体
+    h = b.hex()
+    return f"{h[0:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:32]}"
 
 def new_storage_config(old_config: Optional[StorageConfig] = None) -> StorageConfig:
     """创建新的存储配置"""
+    # 一次读取所有标识符所需的随机数，按区间切分使用
+    mac_end = MAC_MACHINE_ID_RANDOM_BYTES
+    sqm_end = mac_end + MAC_MACHINE_ID_RANDOM_BYTES
+    machine_end = sqm_end + MACHINE_ID_RANDOM_BYTES
+    device_end = machine_end + DEV_DEVICE_ID_RANDOM_BYTES
+    seed = os.urandom(device_end)
     config = StorageConfig(
-        telemetry_mac_machine_id=generate_mac_machine_id(),
-        telemetry_machine_id=generate_machine_id(),
-        telemetry_dev_device_id=generate_dev_device_id(),
+        telemetry_mac_machine_id=generate_mac_machine_id(seed[:mac_end]),
+        telemetry_machine_id=generate_machine_id(seed[sqm_end:machine_end]),
+        telemetry_dev_device_id=generate_dev_device_id(seed[machine_end:device_end]),
         telemetry_sqm_id=""
     )
     
     if old_config and old_config.telemetry_sqm_id:
         config.telemetry_sqm_id = old_config.telemetry_sqm_id
     else:
-        config.telemetry_sqm_id = generate_mac_machine_id()
+        config.telemetry_sqm_id = generate_mac_machine_id(seed[mac_end:sqm_end])
         
     return config
 
-def read_existing_config(username: str) -> Optional[StorageConfig]:
-    """读取现有配置"""
-    config_path = get_config_path(username)
+# 本进程内已确认存在的目录
+_ensured_dirs = set()
+
+def ensure_dir(path: str) -> None:
+    """确保目录存在（每个目录每个进程只检查一次）"""
+    if path in _ensured_dirs:
+        return
+    # 常见情况下目录已存在，一次 stat 即可，不必逐级 mkdir
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+    _ensured_dirs.add(path)
+
+def json_loads(data: bytes):
+    """解析 JSON
+
+    不使用 orjson：它会把超出 64 位的整数静默转为 float，并拒绝 NaN 和孤立代理字符，
+    而保存配置时需要原样保留其他字段。
+    """
+    return JSON_DECODER.decode(data.decode('utf-8'))
+
+def json_dumps(obj) -> bytes:
+    """序列化为缩进 2 格的 JSON 字节串（优先使用 orjson）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            # 超出 64 位的整数、孤立代理字符、JSONConstant 等 orjson 无法精确输出的值
+            pass
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+def read_existing_config(config_path: str) -> Tuple[Optional[StorageConfig], Optional[dict]]:
+    """读取现有配置，同时返回原始数据供保存时复用"""
     try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return StorageConfig(
-                    telemetry_mac_machine_id=data.get("telemetry.macMachineId", ""),
-                    telemetry_machine_id=data.get("telemetry.machineId", ""),
-                    telemetry_dev_device_id=data.get("telemetry.devDeviceId", ""),
-                    telemetry_sqm_id=data.get("telemetry.sqmId", "")
-                )
+        with open(config_path, 'rb') as f:
+            data = json_loads(f.read())
+            config = StorageConfig(
+                telemetry_mac_machine_id=data.get("telemetry.macMachineId", ""),
+                telemetry_machine_id=data.get("telemetry.machineId", ""),
+                telemetry_dev_device_id=data.get("telemetry.devDeviceId", ""),
+                telemetry_sqm_id=data.get("telemetry.sqmId", "")
+            )
+            return config, data
+    except FileNotFoundError:
+        return None, None
     except Exception as e:
         raise AppError(ERR_CONFIG, "read_config", config_path, e)
-    return None
 
-def save_config(config: StorageConfig, username: str) -> None:
-    """保存配置"""
-    config_path = get_config_path(username)
-    os.makedirs(os.path.dirname(config_path), exist_ok=True)
-    
-    # 确保文件可写
-    if os.path.exists(config_path):
-        os.chmod(config_path, 0o666)
+def save_config(config: StorageConfig, config_path: str, original_data: Optional[dict] = None) -> None:
+    """保存配置
 
-        # 创建备份
-        backup_path = f"{config_path}.{int(time.time())}.bak"
-        try:
-            with open(config_path, 'r', encoding='utf-8') as src, \
-                 open(backup_path, 'w', encoding='utf-8') as dst:
-                dst.write(src.read())
-            log_print(f"\n已创建配置文件备份: {backup_path}", Colors.GREEN)
-        except Exception as e:
-            log_print(f"\n创建备份失败: {str(e)}", Colors.YELLOW)
+    original_data 为 read_existing_config 已解析的原始数据，传入时不再重复读取文件。
+    """
+    ensure_dir(os.path.dirname(config_path))
 
     try:
-        # 读取原始文件保留其他字段
-        original_data = {}
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                original_data = json.load(f)
+        original_stat = os.stat(config_path)
+    except FileNotFoundError:
+        original_stat = None
+
+    # 写入是原子的，备份仅在 CURSOR_CONFIG_BACKUP=1 时创建
+    if original_stat is not None:
+        if os.getenv("CURSOR_CONFIG_BACKUP") == "1":
+            backup_path = f"{config_path}.{int(time.time())}.bak"
+            try:
+                # 由内核完成复制（Linux 上为 sendfile，macOS 上为 fcopyfile）
+                shutil.copyfile(config_path, backup_path)
+                log_print(f"\n已创建配置文件备份: {backup_path}", Colors.GREEN)
+            except Exception as e:
+                log_print(f"\n创建备份失败: {str(e)}", Colors.YELLOW)
+        else:
+            log_print("\n未创建配置文件备份（设置 CURSOR_CONFIG_BACKUP=1 以启用）", Colors.YELLOW)
+
+    tmp_path = None
+    try:
+        # 读取原始文件保留其他字段（调用方未提供时）
+        if original_data is None:
+            original_data = {}
+            if original_stat is not None:
+                with open(config_path, 'rb') as f:
+                    original_data = json_loads(f.read())
         
-        # 更新配置
-        new_data = {**original_data, **config.to_dict()}
+        # 原地更新配置，保留其他字段
+        new_data = config.update_into(original_data)
         
-        # 写入新配置
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(new_data, f, indent=2)
+        # 写入同目录下的临时文件后原子替换，避免中途失败留下截断的配置
+        # 使用 mkstemp 生成随机文件名并以 O_EXCL 创建，不会跟随预先放置的符号链接
+        fd, tmp_path = tempfile.mkstemp(prefix="storage.json.", suffix=".tmp", dir=os.path.dirname(config_path))
+        with os.fdopen(fd, 'wb') as f:
+            if original_stat is not None:
+                # 保持原文件可写
+                os.chmod(fd, 0o666)
+            else:
+                # 新建文件与普通 open() 一致，使用 umask 决定的默认权限
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(fd, 0o666 & ~umask)
+            # 以 sudo 运行时恢复原属主，避免配置文件变成 root 所有
+            if original_stat is not None and os.geteuid() == 0 \
+                    and (original_stat.st_uid, original_stat.st_gid) != (os.geteuid(), os.getegid()):
+                os.chown(fd, original_stat.st_uid, original_stat.st_gid)
+            f.write(json_dumps(new_data))
+            f.flush()
+            os.fsync(fd)
+        os.replace(tmp_path, config_path)
             
     except Exception as e:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
         raise AppError(ERR_CONFIG, "save_config", config_path, e)
 
 def get_running_cursor_processes() -> List[int]:
     """获取运行中的Cursor进程ID列表"""
-    try:
-        output = subprocess.check_output(["pgrep", "-i", "cursor"], text=True)
-        return [int(pid) for pid in output.splitlines()]
-    except subprocess.CalledProcessError:
-        return []
-
-def log_print(text: str, color: str = None, end: str = '\n'):
-    """统一的打印和日志记录函数"""
+    if IS_DARWIN:  # macOS 没有 /proc，继续使用 pgrep
+        try:
+            output = subprocess.check_output(["pgrep", "-i", "cursor"], text=True)
+            return sorted({int(pid) for pid in output.splitlines()})
+        except subprocess.CalledProcessError:
+            return []
+
+    # Linux: 一次遍历 /proc 完成批量匹配，避免每次轮询都 fork pgrep
+    self_pid = os.getpid()
+    pids = []
+    with os.scandir('/proc') as entries:
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/comm", 'rb') as f:
+                    name = f.read().rstrip(b'\n')
+                matched = CURSOR_PROCESS_PATTERN.search(name) is not None
+                # 进程名可能被内核截断，未匹配时再检查 cmdline 中的程序名
+                if not matched and len(name) >= COMM_MAX_LEN:
+                    with open(f"/proc/{entry.name}/cmdline", 'rb') as f:
+                        argv0 = f.read().split(b'\0', 1)[0]
+                    matched = CURSOR_PROCESS_PATTERN.search(os.path.basename(argv0)) is not None
+            except OSError:
+                # 进程在扫描期间已退出
+                continue
+            if matched:
+                pid = int(entry.name)
+                if pid != self_pid:
+                    pids.append(pid)
+    pids.sort()
+    return pids
+
+def log_print(text: str, color: str = None, end: str = '\n', flush: bool = False):
+    """统一的打印和日志记录函数
+
+    默认不立即刷新 stdout，仅在等待输入或暂停前传入 flush=True。
+    """
     # 移除文本开头的换行符
     text = text.lstrip('\n')
     
     # 记录到日志（不含颜色代码）
-    logging.info(text)
+    logger.info(text)
     
-    # 直接打印到控制台（带颜色）
+    # 直接打印到控制台（带颜色），分段写入缓冲区，无需构建完整字符串
+    write = sys.stdout.write
     if color:
-        sys.stdout.write(f"{color}{text}{Colors.RESET}{end}")
+        write(color)
+        write(text)
+        write(COLOR_SUFFIX_NEWLINE if end == '\n' else Colors.RESET + end)
     else:
-        sys.stdout.write(f"{text}{end}")
-    sys.stdout.flush()
+        write(text)
+        write(end)
+    if flush:
+        sys.stdout.flush()
 
 def print_colored(text: str, color: str):
     """打印彩色文本并记录日志"""
@@ -237,24 +424,26 @@ def show_id_comparison(old_config: Optional[StorageConfig], new_config: StorageC
 
 def check_cursor_running() -> bool:
     """检查Cursor是否在运行"""
-    pids = get_running_cursor_processes()
-    if pids:
+    # 返回的PID已去重并排序
+    unique_pids = get_running_cursor_processes()
+    if unique_pids:
         log_print("发现正在运行的Cursor进程：", Colors.YELLOW)
-        # 使用集合去重PID
-        unique_pids = sorted(set(pids))
         for pid in unique_pids:
             log_print(f"PID: {pid}")
         log_print("请手动关闭这些进程后再运行本程序。", Colors.YELLOW)
         # 询问用户是否要自动关闭进程
-        log_print("\n是否要自动关闭这些进程? [y/N] ", Colors.YELLOW, end='')
+        log_print("\n是否要自动关闭这些进程? [y/N] ", Colors.YELLOW, end='', flush=True)
         choice = input().lower()
         if choice == 'y':
             # 自动关闭所有进程
             for pid in unique_pids:
                 try:
-                    subprocess.run(['kill', '-9', str(pid)], check=False)
+                    os.kill(pid, signal.SIGKILL)
                     log_print(f"已终止进程 {pid}", Colors.GREEN)
-                except subprocess.SubprocessError:
+                except ProcessLookupError:
+                    # 进程已自行退出
+                    pass
+                except PermissionError:
                     log_print(f"终止进程 {pid} 失败", Colors.RED)
             return False
         else:       
@@ -277,7 +466,7 @@ def ensure_cursor_closed() -> Optional[str]:
             return None
 
         message = f"请在继续之前关闭 Cursor。尝试 {attempt}/{max_attempts}\n请稍候..."
-        log_print(f"⚡ {message}", Colors.CYAN)
+        log_print(f"⚡ {message}", Colors.CYAN, flush=True)
         time.sleep(5)
 
     return "cursor is still running"
@@ -316,9 +505,9 @@ def confirm_action(prompt: str) -> bool:
     """获取用户确认"""
     while True:
         response = input(f"\n{prompt} (y/n): ").lower().strip()
-        if response in ['y', 'yes', '是']:
+        if response in CONFIRM_YES:
             return True
-        if response in ['n', 'no', '否']:
+        if response in CONFIRM_NO:
             return False
         print("请输入 y (是) 或 n (否)")
 
@@ -327,41 +516,48 @@ def setup_logging():
     # 使用固定的日志文件名
     log_file = 'cursor_machine_id.log'
     
-    # 创建文件处理器（详细日志，使用追加模式）
-    file_handler = logging.FileHandler(log_file, encoding='utf-8', mode='a')
+    # 创建文件处理器（详细日志，使用追加模式，首次写入时才打开文件）
+    file_handler = logging.FileHandler(log_file, encoding='utf-8', mode='a', delay=True)
     file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+
+    # 通过内存缓冲合并写入，遇到 ERROR 或程序退出时再落盘
+    memory_handler = logging.handlers.MemoryHandler(
+        capacity=64,
+        flushLevel=logging.ERROR,
+        target=file_handler
+    )
     
     # 配置根日志记录器（只使用文件处理器）
     logging.basicConfig(
         level=logging.INFO,
-        handlers=[file_handler]
+        handlers=[memory_handler]
     )
     
-    # 添加分隔线，标记新的会话开始
-    logging.info("="*50)
-    logging.info("新会话开始")
-    
     return log_file
 
 def main():
     """主函数"""
-    # 设置日志
+    # 设置日志（日志文件在首次落盘时才打开）
     log_file = setup_logging()
-    logging.info("程序启动")
 
-    # 创建文本资源实例
-    texts = TextResource()
+    # 添加分隔线，标记新的会话开始
+    logger.info("="*50)
+    logger.info("新会话开始")
+    logger.info("程序启动")
 
     username = os.getenv("USER")
     if not username:
         log_print("错误：无法确定当前用户", Colors.RED)
         return
 
+    # 配置文件路径只计算一次，供读取和保存共用
+    config_path = get_config_path(username)
+
     # 记录基本信息
-    logging.info(f"当前用户: {username}")
-    logging.info(f"操作系统: {platform.system()}")
-    logging.info(f"Python版本: {sys.version}")
+    logger.info(f"当前用户: {username}")
+    logger.info(f"操作系统: {SYSTEM_NAME}")
+    logger.info(f"Python版本: {sys.version}")
 
     # 检查Cursor是否在运行
     if check_cursor_running():
@@ -369,14 +565,16 @@ def main():
         return
 
     # 清屏并显示横幅
+    sys.stdout.flush()
     os.system('clear')
     print_cyberpunk_banner()
 
     try:
         # 读取当前配置
         log_print("\n正在读取当前配置...", Colors.CYAN)
+        current_config, original_data = None, None
         try:
-            current_config = read_existing_config(username)
+            current_config, original_data = read_existing_config(config_path)
             if current_config:
                 show_config(current_config, "当前配置")
             else:
@@ -399,9 +597,9 @@ def main():
 
         # 保存配置
         log_print("\n正在保存配置...", Colors.CYAN)
-        save_config(new_config, username)
+        save_config(new_config, config_path, original_data)
 
-        log_print(f"\n{texts.success_message}", Colors.GREEN)
+        log_print(f"\n{TEXT.success_message}", Colors.GREEN)
         log_print("\n操作完成！", Colors.GREEN)
 
     except Exception as e:
@@ -414,10 +612,10 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        logging.warning("用户取消操作")
+        logger.warning("用户取消操作")
         log_print("\n操作已取消", Colors.YELLOW)
         sys.exit(1)
     except Exception as e:
-        logging.error(f"发生致命错误: {str(e)}", exc_info=True)
+        logger.error(f"发生致命错误: {str(e)}", exc_info=True)
         log_print(f"\n致命错误: {str(e)}", Colors.RED)
         sys.exit(1)